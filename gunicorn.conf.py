@@ -0,0 +1,51 @@
+import os
+
+from uvicorn.workers import UvicornWorker
+
+# Each worker runs its own whisper thread pool, so size the worker count so that
+# workers x whisper threads matches the CPUs we are allowed to run on. Running
+# more threads than that just makes the ggml/OpenMP pools thrash each other.
+CPUS = sorted(os.sched_getaffinity(0))
+# Same default as main.py: all allowed CPUs but one
+WHISPER_THREADS = int(os.environ.get("WHISPER_THREADS", max(1, len(CPUS) - 1)))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+
+class WhisperWorker(UvicornWorker):
+    """Uvicorn worker on uvloop and httptools, without uvicorn's access log, which
+    would otherwise build a log record for every request"""
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "loop": "uvloop", "http": "httptools", "access_log": False}
+
+worker_class = WhisperWorker
+workers = int(os.environ.get("WEB_CONCURRENCY", max(1, len(CPUS) // WHISPER_THREADS)))
+
+# Long uploads can take a while to transcribe
+timeout = 300
+
+# Import the app, and with it load the whisper model, once in the master before
+# forking. whisper.cpp reads the weights into its own buffers rather than mmap-ing
+# the file, so this is what lets all workers share one physical copy: the pages
+# are inherited copy-on-write and inference never writes to them. Warm-up runs in
+# each worker's startup handler, after the fork, so no native thread pools exist
+# in the master when it forks.
+#
+# CPU builds only: a CUDA build would initialize the ggml CUDA backend in the
+# master, and a CUDA context does not survive fork(), so each worker's first GPU
+# inference would fail or hang. With WHISPER_CUDA=ON (set by the Dockerfile for
+# GPU images) every worker imports the app, and loads its own model, after forking.
+preload_app = os.environ.get("WHISPER_CUDA", "OFF").upper() != "ON"
+
+def pre_fork(server, worker):
+    """Give each new worker a CPU slot no live worker is using"""
+    used = {getattr(w, "cpu_slot", None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next((slot for slot in range(workers) if slot not in used), 0)
+
+def post_fork(server, worker):
+    """Pin each worker to its own slice of CPUs"""
+    if len(CPUS) < workers * WHISPER_THREADS:
+        return
+
+    slot = worker.cpu_slot
+    cpus = CPUS[slot * WHISPER_THREADS:(slot + 1) * WHISPER_THREADS]
+    os.sched_setaffinity(0, cpus)
+    server.log.info(f"Pinned worker {worker.pid} to CPUs {cpus}")
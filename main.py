@@ -1,429 +1,1356 @@
 import os
-import uuid
+import asyncio
 import subprocess
 import logging
-import json
+import logging.handlers
+import queue
+import atexit
 import tempfile
-from fastapi import FastAPI, UploadFile, File, BackgroundTasks
-from fastapi.responses import JSONResponse
+import re
+import time
+import mmap
+import io
+import hashlib
+import threading
+import itertools
 import shutil
+import shlex
+import secrets
+import ctypes
+import ctypes.util
+import socket
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import wave
+import struct
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Threads for each whisper inference. Under gunicorn every worker is pinned to its
+# own slice of this many CPUs, so cap the OpenMP/BLAS pools to match before any
+# native library that reads these variables at load time is imported. By default
+# use the CPUs we may run on (the container's cpuset, not the host's core count),
+# leaving one for the event loop and ffmpeg.
+if hasattr(os, "sched_getaffinity"):
+    AVAILABLE_CPUS = len(os.sched_getaffinity(0))
+else:
+    AVAILABLE_CPUS = os.cpu_count()
+WHISPER_THREADS = int(os.environ.get("WHISPER_THREADS", max(1, AVAILABLE_CPUS - 1)))
+for thread_env in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(thread_env, str(WHISPER_THREADS))
+
+import numpy as np
+import orjson
+import aiofiles
+from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+
+try:
+    from pywhispercpp.model import Model as WhisperModel
+except ImportError:
+    WhisperModel = None
+
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import soundfile
+    import soxr
+except (ImportError, OSError):
+    # soundfile raises OSError rather than ImportError when libsndfile is missing
+    soundfile = None
+
+# Set up logging; per-request messages are logged at DEBUG, so production
+# deployments can run at WARNING without paying for them. Records are only queued
+# on the request path and written out by a listener thread, so a slow log sink
+# never blocks the event loop.
+LOG_HANDLER = logging.StreamHandler()
+LOG_HANDLER.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+QUEUE_HANDLER = logging.handlers.QueueHandler(queue.SimpleQueue())
+# The listener's handler adds the prefix; the queue handler only merges the message
+# with its arguments and traceback
+QUEUE_HANDLER.setFormatter(logging.Formatter('%(message)s'))
+logging.getLogger().addHandler(QUEUE_HANDLER)
+logging.getLogger().setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+def start_log_listener():
+    """Start the thread that writes queued log records, with a fresh queue"""
+    global LOG_LISTENER
+    # Threads don't survive fork, so under preload_app each worker starts its own
+    # listener, and gets its own queue so it doesn't replay the master's backlog
+    QUEUE_HANDLER.queue = queue.SimpleQueue()
+    LOG_LISTENER = logging.handlers.QueueListener(QUEUE_HANDLER.queue, LOG_HANDLER)
+    LOG_LISTENER.start()
+
+start_log_listener()
+os.register_at_fork(after_in_child=start_log_listener)
+# Flush whatever is still queued on exit
+atexit.register(lambda: LOG_LISTENER.stop())
 logger = logging.getLogger("whisper-api")
 
-app = FastAPI()
+# Serialize responses with orjson rather than the stdlib json encoder
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Look for the correct whisper binary
 WHISPER_CPP_DIR = "/app/whisper.cpp"
 WHISPER_BINARY_MAIN = os.path.join(WHISPER_CPP_DIR, "build/bin/main")
 WHISPER_BINARY_CLI = os.path.join(WHISPER_CPP_DIR, "build/bin/whisper-cli")
+WHISPER_SERVER_BINARY = os.path.join(WHISPER_CPP_DIR, "build/bin/whisper-server")
 
 # Check which binary exists and is executable
 if os.path.exists(WHISPER_BINARY_CLI) and os.access(WHISPER_BINARY_CLI, os.X_OK):
     WHISPER_BINARY = WHISPER_BINARY_CLI
-    logger.info(f"Using whisper-cli binary: {WHISPER_BINARY}")
+    logger.info("Using whisper-cli binary: %s", WHISPER_BINARY)
 else:
     WHISPER_BINARY = WHISPER_BINARY_MAIN
-    logger.info(f"Using main binary: {WHISPER_BINARY}")
+    logger.info("Using main binary: %s", WHISPER_BINARY)
 
-# Try both models - base first, then tiny as fallback
+# Try the quantized base models first, then fp16 base, then tiny as fallback. q5_0
+# cuts the fp16 model's weight bandwidth by about 60% and q8_0 by half, both for a
+# negligible WER change on base.en.
+BASE_Q5_MODEL_PATH = os.path.join(WHISPER_CPP_DIR, "models/base.en-q5_0.bin")
+BASE_Q8_MODEL_PATH = os.path.join(WHISPER_CPP_DIR, "models/base.en-q8_0.bin")
 BASE_MODEL_PATH = os.path.join(WHISPER_CPP_DIR, "models/base.en.bin")
 TINY_MODEL_PATH = os.path.join(WHISPER_CPP_DIR, "models/tiny.en.bin")
 
-if os.path.exists(BASE_MODEL_PATH) and os.path.getsize(BASE_MODEL_PATH) > 100000000:
+if os.path.exists(BASE_Q5_MODEL_PATH) and os.path.getsize(BASE_Q5_MODEL_PATH) > 40000000:
+    MODEL_PATH = BASE_Q5_MODEL_PATH
+    logger.info("Using quantized base model: %s", MODEL_PATH)
+elif os.path.exists(BASE_Q8_MODEL_PATH) and os.path.getsize(BASE_Q8_MODEL_PATH) > 50000000:
+    MODEL_PATH = BASE_Q8_MODEL_PATH
+    logger.info("Using quantized base model: %s", MODEL_PATH)
+elif os.path.exists(BASE_MODEL_PATH) and os.path.getsize(BASE_MODEL_PATH) > 100000000:
     MODEL_PATH = BASE_MODEL_PATH
-    logger.info(f"Using base model: {MODEL_PATH}")
+    logger.info("Using base model: %s", MODEL_PATH)
 elif os.path.exists(TINY_MODEL_PATH) and os.path.getsize(TINY_MODEL_PATH) > 10000000:
     MODEL_PATH = TINY_MODEL_PATH
-    logger.info(f"Using tiny model: {MODEL_PATH}")
+    logger.info("Using tiny model: %s", MODEL_PATH)
 else:
     # Default to base model and let the health check report the issue
     MODEL_PATH = BASE_MODEL_PATH
-    logger.warning(f"No valid model found, defaulting to: {MODEL_PATH}")
+    logger.warning("No valid model found, defaulting to: %s", MODEL_PATH)
 
-@app.post("/transcribe")
-async def transcribe(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
-    logger.info(f"Transcription request received for file: {file.filename}")
+# Preflight the model and binary once here rather than on every request;
+# only /health re-checks them
+MODEL_SIZE = os.path.getsize(MODEL_PATH) if os.path.exists(MODEL_PATH) else 0
+MODEL_OK = MODEL_SIZE > 10000000
+BINARY_OK = os.access(WHISPER_BINARY, os.X_OK)
+
+# SIMD extensions ggml can dispatch to, as reported by the kernel, for /health
+SIMD_FLAGS = ("avx", "avx2", "fma", "f16c", "avx512f", "avx512bw", "avx512_vnni", "avx512_vbmi", "avx_vnni")
+try:
+    with open("/proc/cpuinfo") as f:
+        cpu_flags = next((line.split(":", 1)[1].split() for line in f if line.startswith("flags")), [])
+    CPU_FEATURES = [flag for flag in SIMD_FLAGS if flag in cpu_flags]
+except OSError:
+    CPU_FEATURES = []
+logger.info("CPU SIMD features: %s", " ".join(CPU_FEATURES) or "unknown")
+
+# whisper.cpp's progress output costs formatting time and output to filter, so it
+# is only turned on when debugging slow transcriptions
+WHISPER_PRINT_PROGRESS = os.environ.get("WHISPER_PRINT_PROGRESS", "0") == "1"
+
+# Keep the model resident in-process when the pywhispercpp binding is available,
+# otherwise fall back to running the whisper binary for every request. This happens
+# at import so that under gunicorn's preload_app the weights are loaded once in the
+# master and shared copy-on-write by every worker. CUDA builds don't preload (see
+# gunicorn.conf.py), so there each worker loads its own copy after the fork.
+MODEL = None
+if WhisperModel is None:
+    logger.info("pywhispercpp not available, transcribing with the whisper binary")
+elif MODEL_OK:
+    try:
+        MODEL = WhisperModel(
+            MODEL_PATH,
+            n_threads=WHISPER_THREADS,
+            print_progress=WHISPER_PRINT_PROGRESS,
+            print_realtime=False
+        )
+        logger.info("Loaded in-process whisper model: %s", MODEL_PATH)
+    except Exception as e:
+        logger.error("Failed to load in-process whisper model, using binary instead: %s", e)
+        MODEL = None
+
+# Keep intermediate files in our own directory on a RAM-backed tmpfs when one is
+# available, so they never go through the container's overlay filesystem
+DISK_TMP_DIR = tempfile.gettempdir()
+if os.path.isdir("/dev/shm"):
+    TMP_DIR = "/dev/shm/whisper"
+    os.makedirs(TMP_DIR, exist_ok=True)
+else:
+    TMP_DIR = DISK_TMP_DIR
+logger.info("Using temporary directory root: %s", TMP_DIR)
+
+def tmpfs_headroom():
+    """Bytes that can still be written to TMP_DIR. tmpfs pages are charged to the
+    container's memory cgroup, so that limit applies as well as the mount's size."""
+    stat = os.statvfs(TMP_DIR)
+    headroom = stat.f_bavail * stat.f_frsize
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            with open("/sys/fs/cgroup/memory.current") as f:
+                headroom = min(headroom, int(limit) - int(f.read()))
+    except (OSError, ValueError):
+        pass
+    return headroom
+
+# Per-request directories are named by worker pid and a counter; that is unique
+# across workers without drawing random names for every request
+TEMP_DIR_IDS = itertools.count()
+
+def make_temp_dir(needed_bytes=0):
+    """Create a per-request temporary directory, on tmpfs unless it is too full to
+    hold needed_bytes"""
+    root = TMP_DIR
+    if TMP_DIR != DISK_TMP_DIR and tmpfs_headroom() < needed_bytes:
+        logger.warning("Not enough tmpfs space for %s bytes, using %s", needed_bytes, DISK_TMP_DIR)
+        root = DISK_TMP_DIR
+    # The root may be world-writable, so like mkdtemp only ever use a directory we
+    # created ourselves, private to us; never one (or a symlink) someone else made.
+    # A name that is taken, e.g. left behind by a crashed worker whose pid has been
+    # recycled, just moves on to the next id.
+    while True:
+        temp_dir = os.path.join(root, f"whisper-{os.getpid()}-{next(TEMP_DIR_IDS)}")
+        try:
+            os.mkdir(temp_dir, 0o700)
+            return temp_dir
+        except FileExistsError:
+            continue
+
+# whisper.cpp contexts are not thread-safe, so run inference on a single dedicated
+# thread; this serializes access to the model while keeping the event loop free
+WHISPER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+def pcm_to_samples(pcm, out=None):
+    """Convert 16 kHz mono s16le PCM, as bytes or an int16 array, to the float32
+    samples whisper expects, writing them to out if it is given"""
+    return np.multiply(np.frombuffer(pcm, np.int16), np.float32(1.0 / 32768.0), out=out)
+
+def transcribe_samples(samples):
+    """Run the resident model over float32 samples and join its segments"""
+    segments = MODEL.transcribe(samples, n_threads=WHISPER_THREADS)
+    return "\n".join(s.text.strip() for s in segments if s.text.strip())
+
+# Requests that arrive within BATCH_WAIT seconds of each other are decoded together,
+# up to BATCH_SIZE at a time. With the resident model only clips that fit in a single
+# 30 s whisper window are batched and longer audio is split up and decoded on its
+# own; the binary fallback batches everything into one process run.
+BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "8"))
+BATCH_WAIT = float(os.environ.get("BATCH_WAIT", "0.05"))
+BATCH_MAX_SAMPLES = 30 * 16000
+# Each clip in a parallel decode gets its own whisper state and at least one compute
+# thread, so the resident model decodes at most WHISPER_THREADS clips at a time
+# rather than oversubscribing the CPUs the worker is pinned to
+BATCH_GROUP_SIZE = max(1, min(BATCH_SIZE, WHISPER_THREADS))
+# Every clip in a parallel decode is padded to the longest one, so clips under
+# 10 s and clips of 10-30 s are decoded as separate batches
+BATCH_BUCKET_SAMPLES = 10 * 16000
+TRANSCRIBE_QUEUE = asyncio.Queue()
+BATCH_WORKER = None
+
+# Clips are converted from PCM straight into one scratch array per whisper thread,
+# reused across requests and batches instead of allocating a new float array for
+# each. It is backed by anonymous memory so it can be put on transparent huge pages.
+BATCH_BUFFER = threading.local()
+
+def batch_buffer(n_samples):
+    """Return a reusable float32 scratch array of n_samples for the calling thread"""
+    samples = getattr(BATCH_BUFFER, "samples", None)
+    if samples is None or len(samples) < n_samples:
+        backing = mmap.mmap(-1, max(n_samples, BATCH_GROUP_SIZE * BATCH_MAX_SAMPLES) * 4)
+        if hasattr(mmap, "MADV_HUGEPAGE"):
+            backing.madvise(mmap.MADV_HUGEPAGE)
+        samples = BATCH_BUFFER.samples = np.frombuffer(backing, dtype=np.float32)
+    return samples[:n_samples]
+
+def transcribe_batch(clips):
+    """Decode several int16 PCM clips in one whisper_full_parallel call.
+
+    Each clip is converted into the batch buffer, zero-padded to the same slot
+    length, so whisper.cpp's per-processor split lands exactly on clip boundaries
+    and every clip is decoded on its own state while sharing the loaded weights.
+    Segments are mapped back to their clip by timestamp.
+    """
+    slot = max(len(clip) for clip in clips)
+    samples = batch_buffer(slot * len(clips))
+    for i, clip in enumerate(clips):
+        pcm_to_samples(clip, samples[i * slot:i * slot + len(clip)])
+        samples[i * slot + len(clip):(i + 1) * slot] = 0
     
-    # Create a unique temporary directory for this request
-    temp_dir = tempfile.mkdtemp()
-    logger.info(f"Created temporary directory: {temp_dir}")
+    if len(clips) == 1:
+        return [transcribe_samples(samples)]
     
-    try:
-        # Generate unique filenames with full paths
-        input_filename = os.path.join(temp_dir, f"input_{uuid.uuid4()}.{file.filename.split('.')[-1]}")
-        output_wav = os.path.join(temp_dir, f"converted_{uuid.uuid4()}.wav")
-        
-        # Save uploaded file
-        with open(input_filename, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+    segments = MODEL.transcribe(
+        samples,
+        n_processors=len(clips),
+        n_threads=max(1, WHISPER_THREADS // len(clips))
+    )
+    
+    texts = [[] for _ in clips]
+    for s in segments:
+        # Segment timestamps are in 10 ms units, i.e. 160 samples at 16 kHz; use the
+        # midpoint so rounding of the per-processor offset can't push it into a neighbour
+        index = min(len(clips) - 1, (s.t0 + s.t1) * 80 // slot)
+        if s.text.strip():
+            texts[index].append(s.text.strip())
+    return ["\n".join(lines) for lines in texts]
+
+# Audio longer than one window is cut into pieces of at most BATCH_MAX_SAMPLES, each
+# ending at the quietest 300 ms of its last 10 s so that cuts fall between words
+SPLIT_SEARCH_SAMPLES = 10 * 16000
+SPLIT_WINDOW_SAMPLES = 300 * 16
+
+def split_at_silence(samples):
+    """Split samples into whisper-window-sized pieces at quiet points"""
+    chunks = []
+    start = 0
+    while len(samples) - start > BATCH_MAX_SAMPLES:
+        search_start = start + BATCH_MAX_SAMPLES - SPLIT_SEARCH_SAMPLES
+        energy = np.cumsum(np.square(samples[search_start:start + BATCH_MAX_SAMPLES], dtype=np.float64))
+        window_energy = energy[SPLIT_WINDOW_SAMPLES:] - energy[:-SPLIT_WINDOW_SAMPLES]
+        cut = search_start + int(np.argmin(window_energy)) + SPLIT_WINDOW_SAMPLES // 2
+        chunks.append(samples[start:cut])
+        start = cut
+    chunks.append(samples[start:])
+    return chunks
+
+def transcribe_long(clip):
+    """Transcribe audio longer than one whisper window.
+
+    Rather than letting whisper slide its window over the whole file one step at a
+    time, the audio is split at quiet points and the pieces are decoded in parallel
+    groups with transcribe_batch, one processor per piece, sharing the thread budget.
+    """
+    chunks = split_at_silence(clip)
+    texts = []
+    for i in range(0, len(chunks), BATCH_GROUP_SIZE):
+        texts.extend(transcribe_batch(chunks[i:i + BATCH_GROUP_SIZE]))
+    return "\n".join(text for text in texts if text)
+
+def length_buckets(batch):
+    """Split queued clips into short and long groups of at most BATCH_GROUP_SIZE for
+    the resident model; the binary takes separate files, so nothing is padded and
+    one group will do"""
+    if MODEL is None:
+        return [batch]
+    short = [item for item in batch if len(item[0]) < BATCH_BUCKET_SAMPLES]
+    long = [item for item in batch if len(item[0]) >= BATCH_BUCKET_SAMPLES]
+    return [bucket[i:i + BATCH_GROUP_SIZE] for bucket in (short, long) for i in range(0, len(bucket), BATCH_GROUP_SIZE)]
+
+async def batch_worker():
+    """Collect queued clips into batches and run them on the whisper thread"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await TRANSCRIBE_QUEUE.get()]
+        deadline = loop.time() + BATCH_WAIT
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(TRANSCRIBE_QUEUE.get(), timeout))
+            except asyncio.TimeoutError:
+                break
         
-        logger.info(f"Saved uploaded file to {input_filename}, size: {os.path.getsize(input_filename)} bytes")
-
-        # Convert audio to WAV
-        logger.info(f"Converting audio file to WAV format")
-        convert_command = [
-            "ffmpeg", "-i", input_filename, 
-            "-ar", "16000", 
-            "-ac", "1", 
-            "-c:a", "pcm_s16le",
-            "-f", "wav", 
-            output_wav
-        ]
+        for bucket in length_buckets(batch):
+            await run_batch(bucket)
+
+async def run_batch(batch):
+    """Transcribe one batch of queued clips and resolve their futures"""
+    logger.debug("Running whisper batch of %s clip(s)", len(batch))
+    clips = [clip for clip, _ in batch]
+    try:
+        if MODEL is not None:
+            loop = asyncio.get_running_loop()
+            transcripts = await loop.run_in_executor(WHISPER_EXECUTOR, transcribe_batch, clips)
+        else:
+            transcripts = await transcribe_batch_with_binary(clips)
+    except Exception as e:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        return
+    
+    for (_, future), transcript in zip(batch, transcripts):
+        if not future.done():
+            future.set_result(transcript)
+
+async def transcribe_pcm(pcm):
+    """Transcribe PCM, batching it with any concurrent requests.
+
+    The resident model takes an int16 view of the PCM, converted to float on the
+    whisper thread, and runs long clips on their own; the binary fallback takes the
+    PCM as is and batches every clip, since each batch costs one process launch and
+    model load.
+    """
+    loop = asyncio.get_running_loop()
+    if MODEL is not None:
+        clip = np.frombuffer(pcm, np.int16)
+        if len(clip) > BATCH_MAX_SAMPLES:
+            return await loop.run_in_executor(WHISPER_EXECUTOR, transcribe_long, clip)
+    else:
+        clip = pcm
+    
+    future = loop.create_future()
+    await TRANSCRIBE_QUEUE.put((clip, future))
+    return await future
+
+def prefault_model_file(path):
+    """Ask the kernel to read the model file into the page cache ahead of first use"""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.madvise(mmap.MADV_WILLNEED)
+
+# Mapping of the model file kept locked in memory for the binary backend
+LOCKED_MODEL_MAPPING = None
+
+def lock_model_file(path):
+    """Map the model file and mlock it, so that its pages stay in the page cache for
+    every run of the whisper binary instead of being evicted between requests"""
+    global LOCKED_MODEL_MAPPING
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # A read-only mmap can't be exported to ctypes directly; numpy gives us its address
+    view = np.frombuffer(mapping, dtype=np.uint8)
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    result = libc.mlock(ctypes.c_void_p(view.ctypes.data), ctypes.c_size_t(len(mapping)))
+    del view
+    if result != 0:
+        mapping.close()
+        # Usually RLIMIT_MEMLOCK; the container needs --ulimit memlock=-1 or CAP_IPC_LOCK
+        raise OSError(ctypes.get_errno(), "mlock failed: " + os.strerror(ctypes.get_errno()))
+    LOCKED_MODEL_MAPPING = mapping
+
+@app.on_event("startup")
+async def warmup():
+    """Move one-time model and decoder start-up costs out of the first request"""
+    try:
+        if MODEL_OK:
+            prefault_model_file(MODEL_PATH)
+        if MODEL_OK and MODEL is None:
+            # The resident model holds its own copy of the weights; the binary reads
+            # the file on every run, so pin it
+            try:
+                lock_model_file(MODEL_PATH)
+            except OSError as e:
+                logger.warning("Could not lock the model file in memory: %s", e)
         
-        convert_result = subprocess.run(
-            convert_command, 
-            check=False,
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True
+        loop = asyncio.get_running_loop()
+        if MODEL is not None:
+            # One second of silence is enough to allocate buffers and spin up the thread pool
+            await loop.run_in_executor(WHISPER_EXECUTOR, transcribe_samples, np.zeros(16000, dtype=np.float32))
+        if av is None:
+            await run_command(["ffmpeg", "-version"])
+        logger.info("Warm-up complete")
+    except Exception as e:
+        logger.warning("Warm-up failed: %s", e)
+
+@app.on_event("startup")
+async def start_batch_worker():
+    """Start the background task that drains the transcription queue"""
+    global BATCH_WORKER
+    BATCH_WORKER = asyncio.create_task(batch_worker())
+
+async def run_command(command, input=None):
+    """Run a command without blocking the event loop, capturing decoded output and
+    optionally feeding it input on stdin"""
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate(input)
+    return subprocess.CompletedProcess(
+        command,
+        proc.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace")
+    )
+
+# LRU cache of transcripts keyed by a hash of the uploaded bytes, so retried or
+# repeated uploads skip decoding and inference entirely
+TRANSCRIPT_CACHE_SIZE = 1024
+TRANSCRIPT_CACHE = OrderedDict()
+TRANSCRIPT_CACHE_LOCK = threading.Lock()
+
+def get_cached_transcript(key):
+    """Return the cached transcript for an upload hash, marking it recently used"""
+    with TRANSCRIPT_CACHE_LOCK:
+        transcript = TRANSCRIPT_CACHE.get(key)
+        if transcript is not None:
+            TRANSCRIPT_CACHE.move_to_end(key)
+        return transcript
+
+def cache_transcript(key, transcript):
+    """Store a transcript, evicting the least recently used entry when full"""
+    with TRANSCRIPT_CACHE_LOCK:
+        TRANSCRIPT_CACHE[key] = transcript
+        TRANSCRIPT_CACHE.move_to_end(key)
+        if len(TRANSCRIPT_CACHE) > TRANSCRIPT_CACHE_SIZE:
+            TRANSCRIPT_CACHE.popitem(last=False)
+
+async def hash_upload(file):
+    """Hash the uploaded bytes in chunks and rewind the upload for decoding"""
+    digest = hashlib.blake2b(digest_size=16)
+    while chunk := await file.read(1 << 20):
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.digest()
+
+# mp4-family demuxers need to seek to the moov atom, so these can't be piped into ffmpeg
+SEEKABLE_INPUT_EXTENSIONS = {"mp4", "m4a", "m4b", "mov", "3gp"}
+
+# ffmpeg arguments around the per-request input; -loglevel error keeps stderr down
+# to the actual error message instead of the banner and stream dump, and -threads 0
+# lets codecs with threaded decoders (AAC, Opus, ...) use every core. -fflags
+# +fastseek is left out: it only speeds up seeking, and every upload is decoded
+# linearly from start to end.
+FFMPEG_PREFIX = ("ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-threads", "0", "-i")
+FFMPEG_SUFFIX = ("-ar", "16000", "-ac", "1", "-f", "s16le", "pipe:1")
+
+# Formats libsndfile decodes natively; anything else goes straight to PyAV/ffmpeg
+SOUNDFILE_EXTENSIONS = {"wav", "flac", "ogg", "oga", "opus", "mp3", "aiff", "aif"}
+# Frames decoded per block, so that like PyAV only a block of the source is ever held
+# as float32 at once rather than the whole upload
+SOUNDFILE_BLOCK_FRAMES = 1 << 16
+
+def decode_with_soundfile(source):
+    """Decode an audio file object with libsndfile and resample it to 16 kHz mono
+    s16le PCM with soxr's polyphase resampler, a block at a time"""
+    def to_pcm(samples):
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    
+    chunks = []
+    with soundfile.SoundFile(source) as f:
+        resampler = None
+        if f.samplerate != 16000:
+            resampler = soxr.ResampleStream(f.samplerate, 16000, 1, dtype="float32", quality="HQ")
+        for block in f.blocks(blocksize=SOUNDFILE_BLOCK_FRAMES, dtype="float32", always_2d=True):
+            samples = block.mean(axis=1)
+            if resampler is not None:
+                samples = resampler.resample_chunk(samples)
+            chunks.append(to_pcm(samples))
+        # Flush the samples still buffered in the resampler
+        if resampler is not None:
+            chunks.append(to_pcm(resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)))
+    return b"".join(chunks)
+
+def decode_with_pyav(source):
+    """Decode and resample an audio file object to 16 kHz mono s16le PCM in-process
+    with PyAV"""
+    chunks = []
+    with av.open(source) as container:
+        stream = container.streams.audio[0]
+        # Same as ffmpeg's -threads 0 for codecs that support threaded decoding
+        stream.thread_type = "AUTO"
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=16000)
+        for frame in container.decode(stream):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().tobytes())
+        # Flush any samples still buffered in the resampler
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().tobytes())
+    return b"".join(chunks)
+
+def read_pcm_wav(data):
+    """Return the samples of a 16 kHz mono 16-bit PCM WAV, or None for anything else"""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+    try:
+        with wave.open(io.BytesIO(data)) as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (16000, 1, 2):
+                return None
+            return wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        # Not plain PCM (e.g. float or compressed WAV), let the decoders handle it
+        return None
+
+def sendfile_copy(src_fd, path):
+    """Copy a file descriptor's contents to path in-kernel with sendfile"""
+    size = os.fstat(src_fd).st_size
+    with open(path, "wb") as dst:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+# Uploads are moved in chunks of this size rather than read into memory at once
+UPLOAD_CHUNK_SIZE = 1 << 16
+
+async def save_upload(file, path):
+    """Write an upload to path, copying in-kernel when it has spooled to disk"""
+    # Starlette keeps uploads in a SpooledTemporaryFile, which rolls over to a
+    # real file once it outgrows its in-memory buffer
+    if getattr(file.file, "_rolled", False):
+        await asyncio.to_thread(sendfile_copy, file.file.fileno(), path)
+    else:
+        async with aiofiles.open(path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+
+async def stream_upload(file, stdin):
+    """Write an upload to a subprocess's stdin chunk by chunk, letting the pipe drain
+    in between so the decode overlaps the copy"""
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            stdin.write(chunk)
+            await stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg exited early; its exit code and stderr report why
+        pass
+    finally:
+        stdin.close()
+
+def splice_to_pipe(src_fd, pipe_fd):
+    """Move a file's contents into a pipe in-kernel with splice, then close the pipe"""
+    try:
+        offset = 0
+        while True:
+            moved = os.splice(src_fd, pipe_fd, 65536, offset_src=offset)
+            if moved == 0:
+                break
+            offset += moved
+    except BrokenPipeError:
+        # ffmpeg exited early; its exit code and stderr report why
+        pass
+    finally:
+        os.close(pipe_fd)
+
+async def decode_audio(file):
+    """Decode an upload to 16 kHz mono s16le PCM, in-process with soundfile or PyAV
+    when available, otherwise with ffmpeg piping through stdin/stdout"""
+    # Sniff the header instead of reading the whole upload into memory up front
+    header = await file.read(12)
+    await file.seek(0)
+    
+    # Uploads already in whisper's input format need no decoding or resampling
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        pcm = read_pcm_wav(await file.read())
+        if pcm is not None:
+            logger.debug("Upload is already 16 kHz mono PCM WAV, skipping conversion")
+            return 0, pcm, ""
+        await file.seek(0)
+    
+    extension = file.filename.split('.')[-1].lower()
+    
+    if soundfile is not None and extension in SOUNDFILE_EXTENSIONS:
+        try:
+            pcm = await asyncio.to_thread(decode_with_soundfile, file.file)
+            return 0, pcm, ""
+        except Exception as e:
+            logger.debug("soundfile could not decode upload, trying the other decoders: %s", e)
+            await file.seek(0)
+    
+    if av is not None:
+        try:
+            pcm = await asyncio.to_thread(decode_with_pyav, file.file)
+            return 0, pcm, ""
+        except Exception as e:
+            # Let the ffmpeg binary have a go at anything PyAV can't handle
+            logger.warning("PyAV could not decode upload, falling back to ffmpeg: %s", e)
+            await file.seek(0)
+    
+    if extension in SEEKABLE_INPUT_EXTENSIONS and getattr(file.file, "_rolled", False) and os.path.isdir("/dev/fd"):
+        # The upload has spooled to a real file, so hand ffmpeg that file's descriptor;
+        # it opens /dev/fd/N as a regular, seekable file and nothing is copied at all
+        logger.debug("Passing spooled upload to ffmpeg, size: %s bytes", file.size)
+        src_fd = file.file.fileno()
+        proc = await asyncio.create_subprocess_exec(
+            *FFMPEG_PREFIX, f"/dev/fd/{src_fd}", *FFMPEG_SUFFIX,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            pass_fds=(src_fd,)
         )
-        
-        if convert_result.returncode != 0:
-            logger.error(f"ffmpeg conversion failed with error: {convert_result.stderr}")
-            return JSONResponse(
-                content={"transcript": f"Error: Failed to convert audio file. ffmpeg error: {convert_result.stderr}"}, 
-                status_code=500
+        pcm, stderr = await proc.communicate()
+    elif extension in SEEKABLE_INPUT_EXTENSIONS:
+        # Only these need a scratch file, so only these get a temporary directory
+        temp_dir = make_temp_dir(file.size or 0)
+        try:
+            input_filename = os.path.join(temp_dir, f"input.{extension}")
+            await save_upload(file, input_filename)
+            logger.debug("Saved uploaded file to %s, size: %s bytes", input_filename, file.size)
+            proc = await asyncio.create_subprocess_exec(
+                *FFMPEG_PREFIX, input_filename, *FFMPEG_SUFFIX,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
-        
-        if not os.path.exists(output_wav) or os.path.getsize(output_wav) == 0:
-            logger.error("WAV file was not created or is empty")
-            return JSONResponse(
-                content={"transcript": "Error: Failed to convert audio file"}, 
-                status_code=500
+            pcm, stderr = await proc.communicate()
+        finally:
+            cleanup_temp_files(temp_dir)
+    elif getattr(file.file, "_rolled", False) and hasattr(os, "splice"):
+        # The upload has spooled to disk, so splice it from the spool file into
+        # ffmpeg's stdin without copying it through userspace
+        logger.debug("Splicing uploaded file to ffmpeg, size: %s bytes", file.size)
+        read_fd, write_fd = os.pipe()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *FFMPEG_PREFIX, "pipe:0", *FFMPEG_SUFFIX,
+                stdin=read_fd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
-            
-        # Try multiple approaches to get a transcript
-        transcript = None
-        approaches_tried = 0
-        
-        # First, try with specific command-line options
-        logger.info("Running whisper transcription with standard options")
-        approaches_tried += 1
-        
-        if WHISPER_BINARY == WHISPER_BINARY_CLI:
-            # New whisper-cli command format
-            whisper_cmd = [
-                WHISPER_BINARY,
-                "--model", MODEL_PATH,
-                "--file", output_wav,
-                "--output-txt"
-            ]
+        except Exception:
+            os.close(write_fd)
+            raise
+        finally:
+            os.close(read_fd)
+        (pcm, stderr), _ = await asyncio.gather(
+            proc.communicate(),
+            asyncio.to_thread(splice_to_pipe, file.file.fileno(), write_fd)
+        )
+    else:
+        logger.debug("Streaming uploaded file to ffmpeg, size: %s bytes", file.size)
+        proc = await asyncio.create_subprocess_exec(
+            *FFMPEG_PREFIX, "pipe:0", *FFMPEG_SUFFIX,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        pcm, stderr, _ = await asyncio.gather(
+            proc.stdout.read(),
+            proc.stderr.read(),
+            stream_upload(file, proc.stdin)
+        )
+        await proc.wait()
+    
+    return proc.returncode, pcm, stderr.decode(errors="replace")
+
+# webrtcvad classifies 10, 20 or 30 ms frames of 16-bit mono PCM
+VAD_AGGRESSIVENESS = 2
+VAD_FRAME_BYTES = 2 * 16000 * 30 // 1000
+# Keep 300 ms either side of detected speech so word onsets and tails aren't clipped
+VAD_PADDING_FRAMES = 10
+
+def speech_regions(pcm):
+    """Return the (start, end) byte ranges of 16 kHz s16le PCM that contain speech"""
+    vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+    n_frames = len(pcm) // VAD_FRAME_BYTES
+    regions = []
+    
+    for i in range(n_frames):
+        if not vad.is_speech(pcm[i * VAD_FRAME_BYTES:(i + 1) * VAD_FRAME_BYTES], 16000):
+            continue
+        start = max(0, i - VAD_PADDING_FRAMES) * VAD_FRAME_BYTES
+        end = min(n_frames, i + 1 + VAD_PADDING_FRAMES) * VAD_FRAME_BYTES
+        if regions and start <= regions[-1][1]:
+            regions[-1][1] = end
         else:
-            # Old main binary format
-            whisper_cmd = [
-                WHISPER_BINARY,
-                "-m", MODEL_PATH,
-                "-f", output_wav,
-                "-otxt"
-            ]
-        
-        logger.info(f"Running command: {' '.join(whisper_cmd)}")
-        
-        result = subprocess.run(
-            whisper_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+            regions.append([start, end])
+    
+    # Don't drop the partial frame at the end if speech runs right up to it
+    if regions and regions[-1][1] == n_frames * VAD_FRAME_BYTES:
+        regions[-1][1] = len(pcm)
+    return [(start, end) for start, end in regions]
+
+def trim_silence(pcm):
+    """Drop the non-speech stretches from 16 kHz s16le PCM"""
+    return b"".join(pcm[start:end] for start, end in speech_regions(pcm))
+
+# Audio whose loudest 30 ms frame is quieter than this RMS, relative to full scale,
+# is treated as silence. whisper returns nothing (or hallucinates) on it, so it isn't
+# worth an inference pass. The loudest frame rather than the whole upload is gated so
+# that a short utterance in a long, quiet recording still gets transcribed.
+SILENCE_RMS = 1e-3
+
+def is_silent(pcm):
+    """Whether no 30 ms frame of s16le PCM is loud enough to contain speech"""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    if not len(samples):
+        return True
+    frame = VAD_FRAME_BYTES // 2
+    frames = np.pad(samples, (0, -len(samples) % frame)).reshape(-1, frame)
+    loudest = float(np.max(np.einsum("ij,ij->i", frames, frames))) / min(frame, len(samples))
+    return np.sqrt(loudest) < SILENCE_RMS
+
+def wav_header(n_bytes):
+    """Build the 44-byte RIFF header for n_bytes of 16 kHz mono s16le PCM"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + n_bytes, b"WAVE",
+        b"fmt ", 16, 1, 1, 16000, 2 * 16000, 2, 16,
+        b"data", n_bytes
+    )
+
+@app.post("/transcribe")
+async def transcribe(file: UploadFile = File(...)):
+    logger.debug("Transcription request received for file: %s", file.filename)
+    
+    cache_key = await hash_upload(file)
+    cached_transcript = get_cached_transcript(cache_key)
+    if cached_transcript is not None:
+        logger.debug("Returning cached transcript, length: %s", len(cached_transcript))
+        return {"transcript": cached_transcript}
+    
+    if MODEL is None and not (MODEL_OK and BINARY_OK):
+        logger.error("No usable whisper backend: model ok %s, binary ok %s", MODEL_OK, BINARY_OK)
+        return ORJSONResponse(
+            content={"transcript": "Error: The transcription model or whisper binary is not available"}, 
+            status_code=503
         )
+    
+    try:
+        # Decode the upload straight to 16 kHz mono PCM in memory
+        logger.debug("Converting audio file to 16 kHz mono PCM")
+        returncode, pcm, ffmpeg_stderr = await decode_audio(file)
         
-        logger.info(f"Command exit code: {result.returncode}")
-        logger.info(f"Command stdout: {result.stdout}")
-        logger.info(f"Command stderr: {result.stderr}")
-        
-        # Look for the transcript
-        txt_file = output_wav.replace(".wav", ".txt")
-        if os.path.exists(txt_file):
-            with open(txt_file, "r") as f:
-                transcript = f.read().strip()
-            logger.info(f"Found transcript in file, length: {len(transcript)}")
-        
-        # If no transcript in file, try to extract from stdout
-        if not transcript:
-            # Skip the warning message about deprecated binary
-            stdout_lines = result.stdout.split("\n")
-            filtered_lines = []
-            
-            for line in stdout_lines:
-                # Skip the deprecation warning
-                if any(warning in line for warning in [
-                    "WARNING:", "deprecated", "whisper-cli", "https://github.com"
-                ]):
-                    continue
-                if line.strip() == "":
-                    continue
-                
-                # Keep substantive content
-                filtered_lines.append(line)
-            
-            if filtered_lines:
-                transcript = "\n".join(filtered_lines)
-                logger.info(f"Extracted transcript from stdout, length: {len(transcript)}")
-        
-        # If still no transcript, try with streaming output
-        if not transcript:
-            logger.info("Trying alternative approach with streaming output")
-            approaches_tried += 1
-            
-            if WHISPER_BINARY == WHISPER_BINARY_CLI:
-                stream_cmd = [
-                    WHISPER_BINARY,
-                    "--model", MODEL_PATH,
-                    "--file", output_wav,
-                    "--print-special",
-                    "--print-progress"
-                ]
-            else:
-                stream_cmd = [
-                    WHISPER_BINARY,
-                    "-m", MODEL_PATH,
-                    "-f", output_wav,
-                    "--print-special",
-                    "--print-progress"
-                ]
-            
-            stream_result = subprocess.run(
-                stream_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+        if returncode != 0:
+            logger.error("ffmpeg conversion failed with error: %s", ffmpeg_stderr)
+            return ORJSONResponse(
+                content={"transcript": f"Error: Failed to convert audio file. ffmpeg error: {ffmpeg_stderr}"}, 
+                status_code=500
             )
-            
-            logger.info(f"Stream command exit code: {stream_result.returncode}")
-            
-            # Filter out the warnings and extract actual content
-            stdout_content = stream_result.stdout
-            if stdout_content:
-                # Skip warning lines and extract actual content
-                lines = stdout_content.split('\n')
-                content_lines = []
-                for line in lines:
-                    # Skip deprecation warning and empty lines
-                    if any(warning in line for warning in [
-                        "WARNING:", "deprecated", "whisper-cli", "https://github.com"
-                    ]):
-                        continue
-                    
-                    # Skip progress indicators
-                    if line.startswith('['):
-                        continue
-                        
-                    # Keep non-empty lines that aren't part of the warning
-                    if line.strip():
-                        content_lines.append(line)
-                
-                if content_lines:
-                    transcript = "\n".join(content_lines)
-                    logger.info(f"Extracted transcript from streaming output, length: {len(transcript)}")
         
-        # Try one more approach with language specification
-        if not transcript:
-            logger.info("Trying approach with explicit language setting")
-            approaches_tried += 1
-            
-            if WHISPER_BINARY == WHISPER_BINARY_CLI:
-                lang_cmd = [
-                    WHISPER_BINARY,
-                    "--model", MODEL_PATH,
-                    "--file", output_wav,
-                    "--language", "en"
-                ]
-            else:
-                lang_cmd = [
-                    WHISPER_BINARY,
-                    "-m", MODEL_PATH,
-                    "-f", output_wav,
-                    "-l", "en"
-                ]
-            
-            lang_result = subprocess.run(
-                lang_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            logger.info(f"Language-specific command exit code: {lang_result.returncode}")
-            
-            # Process the output
-            if lang_result.stdout:
-                lines = lang_result.stdout.split('\n')
-                content_lines = []
-                for line in lines:
-                    # Skip warnings and progress indicators
-                    if any(warning in line for warning in [
-                        "WARNING:", "deprecated", "whisper-cli", "https://github.com"
-                    ]) or line.startswith('[') or not line.strip():
-                        continue
-                    content_lines.append(line)
-                
-                if content_lines:
-                    transcript = "\n".join(content_lines)
-                    logger.info(f"Extracted transcript from language-specific command, length: {len(transcript)}")
-            
-        # Try tiny model as fallback if base model failed
-        if not transcript and MODEL_PATH == BASE_MODEL_PATH and os.path.exists(TINY_MODEL_PATH):
-            logger.info("Trying tiny model as fallback")
-            approaches_tried += 1
-            
-            if WHISPER_BINARY == WHISPER_BINARY_CLI:
-                tiny_cmd = [
-                    WHISPER_BINARY,
-                    "--model", TINY_MODEL_PATH,
-                    "--file", output_wav
-                ]
-            else:
-                tiny_cmd = [
-                    WHISPER_BINARY,
-                    "-m", TINY_MODEL_PATH,
-                    "-f", output_wav
-                ]
-            
-            tiny_result = subprocess.run(
-                tiny_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            logger.info(f"Tiny model command exit code: {tiny_result.returncode}")
-            
-            # Process the output
-            if tiny_result.stdout:
-                lines = tiny_result.stdout.split('\n')
-                content_lines = []
-                for line in lines:
-                    # Skip warnings and progress indicators
-                    if any(warning in line for warning in [
-                        "WARNING:", "deprecated", "whisper-cli", "https://github.com"
-                    ]) or line.startswith('[') or not line.strip():
-                        continue
-                    content_lines.append(line)
-                
-                if content_lines:
-                    transcript = "\n".join(content_lines)
-                    logger.info(f"Extracted transcript from tiny model, length: {len(transcript)}")
+        logger.debug("Decoded %s bytes of PCM audio", len(pcm))
         
-        # Clean up
-        if background_tasks:
-            background_tasks.add_task(cleanup_temp_files, temp_dir)
+        if not pcm:
+            # Nothing to transcribe, handled like silent audio as /transcribe/stream does
+            logger.debug("ffmpeg produced no audio samples")
+        elif await asyncio.to_thread(is_silent, pcm):
+            logger.debug("Audio is silent, skipping whisper")
+            pcm = b""
+        elif webrtcvad is not None:
+            # Don't spend encoder time on silence
+            pcm = await asyncio.to_thread(trim_silence, pcm)
+            logger.debug("Trimmed non-speech audio, %s bytes of speech remaining", len(pcm))
+            
+        if not pcm:
+            logger.debug("No speech detected, skipping whisper")
+            transcript = None
         else:
-            cleanup_temp_files(temp_dir)
+            # Run the resident model, or the binary when it isn't loaded, batched
+            # with any concurrent requests
+            logger.debug("Running whisper transcription")
+            transcript = await transcribe_pcm(pcm)
+            logger.debug("Extracted transcript, length: %s", len(transcript))
         
         # If we still have no transcript, return a helpful message
         if not transcript:
-            logger.warning(f"No transcript could be extracted after {approaches_tried} attempts")
+            logger.warning("No transcript could be extracted")
             return {"transcript": "Could not generate transcript. The audio might be silent, in an unsupported format, or the models might be having issues."}
         
+        cache_transcript(cache_key, transcript)
         return {"transcript": transcript}
         
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        logger.error(f"Error in transcription: {str(e)}")
-        logger.error(error_details)
+    except Exception:
+        # Keep the traceback in the server log; the client only gets an id to quote
+        error_id = secrets.token_hex(6)
+        logger.exception("Error in transcription [%s]", error_id)
         
-        # Clean up on error
-        try:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-        except Exception as cleanup_error:
-            logger.error(f"Error during cleanup: {cleanup_error}")
-            
-        return JSONResponse(
-            content={"transcript": f"Internal server error:\n{str(e)}\n\nDetails:\n{error_details}"}, 
+        return ORJSONResponse(
+            content={"transcript": "Internal server error", "error_id": error_id}, 
             status_code=500
         )
 
 def cleanup_temp_files(temp_dir):
     """Clean up temporary directory and its contents"""
     try:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            logger.info(f"Cleaned up temporary directory: {temp_dir}")
+        shutil.rmtree(temp_dir)
+        logger.debug("Cleaned up temporary directory: %s", temp_dir)
+    except FileNotFoundError:
+        pass
     except Exception as e:
-        logger.error(f"Error during cleanup: {str(e)}")
+        logger.error("Error during cleanup: %s", e)
 
-@app.get("/test-whisper")
-async def test_whisper():
-    """Test the whisper binary directly with a generated test file"""
-    temp_dir = tempfile.mkdtemp()
-    test_wav = os.path.join(temp_dir, "test.wav")
+def whisper_binary_command(model_path, wav_paths=("-",), output_txt=False):
+    """Build the whisper binary command line; the default "-" input reads the WAV
+    from stdin, and output_txt writes each input's transcript to <input>.txt"""
+    cli = WHISPER_BINARY == WHISPER_BINARY_CLI
+    command = [
+        WHISPER_BINARY,
+        "--model" if cli else "-m", model_path,
+        "--threads" if cli else "-t", str(WHISPER_THREADS),
+        # One processor: concurrency comes from our batching, and splitting the
+        # audio across processors on top of it would oversubscribe the threads
+        "--processors" if cli else "-p", "1"
+    ]
+    for wav_path in wav_paths:
+        command += ["--file" if cli else "-f", wav_path]
+    if cli:
+        # New whisper-cli command format
+        command += ["--language", "en", "--no-timestamps", "--no-prints"]
+    else:
+        # Old main binary format
+        command += ["-l", "en", "-nt", "-np"]
+    if WHISPER_PRINT_PROGRESS:
+        # Progress goes to stderr, so the transcript on stdout is unaffected
+        command.append("--print-progress" if cli else "-pp")
+    if output_txt:
+        command.append("--output-txt" if cli else "-otxt")
+    return command
+
+# The command for the common single-clip case only depends on startup constants
+WHISPER_STDIN_COMMAND = tuple(whisper_binary_command(MODEL_PATH))
+
+# Deprecation notices the old main binary prints alongside its output
+WHISPER_WARNING_RE = re.compile(r"WARNING:|deprecated|whisper-cli|https://github\.com")
+
+def is_transcript_line(line):
+    """Whether a line of whisper binary output is transcript, rather than blank,
+    a progress indicator or the deprecation warning"""
+    return line.strip() and not line.startswith('[') and not WHISPER_WARNING_RE.search(line)
+
+def extract_transcript(stdout):
+    """Pull the transcript lines out of the whisper binary's stdout"""
+    return "\n".join(line.strip() for line in stdout.splitlines() if is_transcript_line(line))
+
+# When the model can't be loaded in-process, keep it resident in a whisper-server
+# process on loopback instead of paying process start-up and model load on every
+# run of the binary. Each worker runs its own server on a free port.
+WHISPER_SERVER_STARTUP_TIMEOUT = 120
+WHISPER_SERVER = {"process": None, "client": None}
+
+def free_loopback_port():
+    """Ask the kernel for a loopback port nothing is listening on"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_for_whisper_server(client):
+    """Mark the server usable once it answers; it only listens after loading the model"""
+    deadline = time.monotonic() + WHISPER_SERVER_STARTUP_TIMEOUT
+    while time.monotonic() < deadline and WHISPER_SERVER["process"].returncode is None:
+        try:
+            await client.get("/")
+            WHISPER_SERVER["client"] = client
+            logger.info("whisper-server ready at %s", client.base_url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.5)
+    logger.warning("whisper-server did not come up, using the whisper binary")
+    await client.aclose()
+
+@app.on_event("startup")
+async def start_whisper_server():
+    """Start a resident whisper-server for the binary backend"""
+    if (MODEL is not None or httpx is None or not MODEL_OK
+            or not os.access(WHISPER_SERVER_BINARY, os.X_OK)):
+        return
+    
+    port = free_loopback_port()
+    WHISPER_SERVER["process"] = await asyncio.create_subprocess_exec(
+        WHISPER_SERVER_BINARY,
+        "-m", MODEL_PATH,
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "-t", str(WHISPER_THREADS),
+        "-l", "en",
+        "-nt",
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None)
+    asyncio.create_task(wait_for_whisper_server(client))
+
+@app.on_event("shutdown")
+async def stop_whisper_server():
+    """Stop the resident whisper-server along with the worker"""
+    if WHISPER_SERVER["client"] is not None:
+        await WHISPER_SERVER["client"].aclose()
+        WHISPER_SERVER["client"] = None
+    if WHISPER_SERVER["process"] is not None and WHISPER_SERVER["process"].returncode is None:
+        WHISPER_SERVER["process"].terminate()
+        await WHISPER_SERVER["process"].wait()
+
+async def transcribe_with_server(wav):
+    """Transcribe WAV data with the resident whisper-server, or return None if it
+    can't be reached so the caller can fall back to running the binary"""
+    client = WHISPER_SERVER["client"]
+    try:
+        response = await client.post(
+            "/inference",
+            files={"file": ("audio.wav", wav, "audio/wav")},
+            data={"response_format": "text"}
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning("whisper-server request failed, using the whisper binary: %s", e)
+        if WHISPER_SERVER["process"].returncode is not None:
+            WHISPER_SERVER["client"] = None
+        return None
+    # whisper-server reports audio it can't read or process as a 200 with a JSON
+    # {"error": ...} body, never a transcript; don't let it through to be cached
+    if "json" in response.headers.get("content-type", "") or response.text.lstrip().startswith('{"error"'):
+        logger.warning("whisper-server could not transcribe the audio, using the whisper binary: %s", response.text)
+        return None
+    return extract_transcript(response.text)
+
+def should_retry_with_tiny(returncode, stderr):
+    """Whether a failed binary run was the model failing to load, and the tiny model
+    is there to retry with"""
+    return (returncode != 0 and "failed to initialize whisper context" in stderr
+            and MODEL_PATH != TINY_MODEL_PATH and os.path.exists(TINY_MODEL_PATH))
+
+async def transcribe_with_binary(wav):
+    """Run the whisper.cpp binary on in-memory WAV data.
+
+    The WAV is piped to the binary on stdin ("-f -"), so it never touches disk. The
+    binary runs once with the language set explicitly; an empty result means there
+    was nothing to transcribe, so it is not re-run with other options. Only a model
+    that fails to load is retried, with the tiny model.
+
+    When the resident whisper-server is up the WAV is posted to it instead.
+    """
+    if WHISPER_SERVER["client"] is not None:
+        transcript = await transcribe_with_server(wav)
+        if transcript is not None:
+            return transcript
+    
+    whisper_cmd = WHISPER_STDIN_COMMAND
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Running command: %s", shlex.join(whisper_cmd))
     
+    result = await run_command(whisper_cmd, wav)
+    
+    # whisper's output can run to kilobytes; only hand it to the logger when it
+    # will actually be written
+    if debug:
+        logger.debug("Command exit code: %s", result.returncode)
+        logger.debug("Command stdout: %s", result.stdout)
+        logger.debug("Command stderr: %s", result.stderr)
+    
+    if should_retry_with_tiny(result.returncode, result.stderr):
+        logger.warning("Failed to load %s, retrying with the tiny model", MODEL_PATH)
+        result = await run_command(whisper_binary_command(TINY_MODEL_PATH), wav)
+        logger.debug("Tiny model command exit code: %s", result.returncode)
+    
+    transcript = extract_transcript(result.stdout)
+    logger.debug("Extracted transcript from stdout, length: %s", len(transcript))
+    return transcript
+
+async def transcribe_batch_with_binary(pcms):
+    """Transcribe several clips with a single whisper binary run.
+
+    Each run pays for loading the model, so rather than spawning one process per
+    request the clips are written to a tmpfs batch directory and passed as repeated
+    -f inputs; -otxt leaves each clip's transcript next to its WAV. A lone clip
+    keeps using stdin, and with the whisper-server up, where the model is already
+    loaded, clips are simply posted to it one by one.
+    """
+    if len(pcms) == 1 or WHISPER_SERVER["client"] is not None:
+        return [await transcribe_with_binary(wav_header(len(pcm)) + pcm) for pcm in pcms]
+    
+    batch_dir = make_temp_dir(sum(44 + len(pcm) for pcm in pcms))
     try:
-        # Create a simple test WAV file with a tone
-        create_test_cmd = [
-            "ffmpeg", "-f", "lavfi", 
-            "-i", "sine=frequency=1000:duration=3", 
-            "-ar", "16000", "-ac", "1", 
-            test_wav
-        ]
+        wav_paths = [os.path.join(batch_dir, f"clip{i}.wav") for i in range(len(pcms))]
+        for wav_path, pcm in zip(wav_paths, pcms):
+            async with aiofiles.open(wav_path, "wb") as f:
+                await f.write(wav_header(len(pcm)))
+                await f.write(pcm)
         
-        subprocess.run(create_test_cmd, check=True, capture_output=True)
+        whisper_cmd = whisper_binary_command(MODEL_PATH, wav_paths, output_txt=True)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Running batched command: %s", shlex.join(whisper_cmd))
+        result = await run_command(whisper_cmd)
+        logger.debug("Batched command exit code: %s", result.returncode)
         
-        # Run whisper on the test file and capture all output
-        if WHISPER_BINARY == WHISPER_BINARY_CLI:
-            test_whisper_cmd = [
-                WHISPER_BINARY,
-                "--model", MODEL_PATH,
-                "--file", test_wav,
-                "--output-txt"
-            ]
-        else:
-            test_whisper_cmd = [
-                WHISPER_BINARY,
-                "-m", MODEL_PATH,
-                "-f", test_wav,
-                "-otxt"
-            ]
+        if result.returncode != 0:
+            # Run the clips one at a time, which also covers the tiny model retry
+            logger.warning("Batched whisper run failed, transcribing clips individually")
+            return [await transcribe_with_binary(wav_header(len(pcm)) + pcm) for pcm in pcms]
         
-        test_result = subprocess.run(
-            test_whisper_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+        transcripts = []
+        for wav_path in wav_paths:
+            try:
+                async with aiofiles.open(wav_path + ".txt", "r") as f:
+                    transcripts.append(extract_transcript(await f.read()))
+            except FileNotFoundError:
+                transcripts.append("")
+        return transcripts
+    finally:
+        cleanup_temp_files(batch_dir)
+
+async def stream_binary_run(command, wav, result):
+    """Run one whisper binary command on WAV data, yielding transcript lines as it
+    prints each segment; its exit code and stderr are left in result"""
+    result["returncode"], result["stderr"] = None, ""
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    
+    async def feed():
+        try:
+            proc.stdin.write(wav)
+            await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The binary exited early; its exit code and stderr report why
+            pass
+        finally:
+            proc.stdin.close()
+    
+    feeder = asyncio.create_task(feed())
+    stderr = asyncio.create_task(proc.stderr.read())
+    try:
+        while line := await proc.stdout.readline():
+            line = line.decode(errors="replace")
+            if is_transcript_line(line):
+                yield line.strip()
+        await feeder
+        result["stderr"] = (await stderr).decode(errors="replace")
+    finally:
+        # Also runs when the client disconnects mid-stream, so don't leave the
+        # process or the pipe tasks behind
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        feeder.cancel()
+        stderr.cancel()
+        await asyncio.gather(feeder, stderr, return_exceptions=True)
+        result["returncode"] = proc.returncode
+
+async def stream_binary_segments(wav):
+    """Transcribe WAV data with the whisper binary, yielding transcript lines as it
+    prints each segment rather than once it exits.
+
+    Like transcribe_with_binary, the resident whisper-server is used when it is up
+    (it doesn't stream, so its lines arrive together) and a model that fails to load
+    is retried with the tiny model. A failed run raises, so the stream ends with an
+    error rather than an empty transcript.
+    """
+    if WHISPER_SERVER["client"] is not None:
+        transcript = await transcribe_with_server(wav)
+        if transcript is not None:
+            for line in transcript.splitlines():
+                yield line
+            return
+    
+    result = {}
+    produced = False
+    async for line in stream_binary_run(WHISPER_STDIN_COMMAND, wav, result):
+        produced = True
+        yield line
+    
+    if not produced and should_retry_with_tiny(result["returncode"], result["stderr"]):
+        logger.warning("Failed to load %s, retrying with the tiny model", MODEL_PATH)
+        async for line in stream_binary_run(whisper_binary_command(TINY_MODEL_PATH), wav, result):
+            yield line
+    
+    if result["returncode"] != 0:
+        raise RuntimeError(f"whisper binary exited with code {result['returncode']}: {result['stderr'].strip()}")
+
+# The streaming request the whisper thread is decoding right now, if any. Once a
+# segment callback is assigned it stays on the model's params for later calls, so
+# the model always gets this dispatcher and it forwards to the current listener.
+SEGMENT_LISTENER = None
+
+def dispatch_segment(segment):
+    """Forward a new segment from whisper.cpp to the streaming request, if any"""
+    if SEGMENT_LISTENER is not None:
+        SEGMENT_LISTENER(segment.text.strip())
+
+def transcribe_samples_streaming(samples, on_segment):
+    """Run the resident model over float32 samples, calling on_segment with each
+    segment's text as whisper.cpp produces it"""
+    global SEGMENT_LISTENER
+    SEGMENT_LISTENER = on_segment
+    try:
+        MODEL.transcribe(samples, n_threads=WHISPER_THREADS, new_segment_callback=dispatch_segment)
+    finally:
+        SEGMENT_LISTENER = None
+
+def transcribe_chunks_streaming(chunks, on_segment, cancelled):
+    """Run the resident model over each int16 chunk in turn, calling on_segment with each
+    segment's text, until the chunks run out or cancelled is set"""
+    for chunk in chunks:
+        if cancelled.is_set():
+            return
+        transcribe_samples_streaming(pcm_to_samples(chunk, batch_buffer(len(chunk))), on_segment)
+
+async def stream_model_segments(pcm):
+    """Transcribe PCM with the resident model, yielding segments as they are decoded.
+
+    The decode runs on its own rather than through the batcher, one piece of the
+    clip after another, so that segments come out in order from the first window
+    on. whisper.cpp's segment callback runs on the whisper thread and hands each
+    segment to the event loop through a queue. If the client goes away, the decode
+    stops at the next piece instead of holding the whisper thread for the rest of
+    the clip.
+    """
+    loop = asyncio.get_running_loop()
+    segments = asyncio.Queue()
+    cancelled = threading.Event()
+    
+    def on_segment(text):
+        loop.call_soon_threadsafe(segments.put_nowait, text)
+    
+    def log_abandoned(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("Abandoned streaming decode failed: %s", future.exception())
+    
+    chunks = await asyncio.to_thread(split_at_silence, np.frombuffer(pcm, np.int16))
+    decode = loop.run_in_executor(WHISPER_EXECUTOR, transcribe_chunks_streaming, chunks, on_segment, cancelled)
+    # Queued behind every segment the callback scheduled, so it marks the end
+    decode.add_done_callback(lambda _: segments.put_nowait(None))
+    
+    finished = False
+    try:
+        while (text := await segments.get()) is not None:
+            if text:
+                yield text
+        finished = True
+        # Surface any error from the decode
+        await decode
+    finally:
+        if not finished:
+            # The generator was closed early; nobody will await the decode now
+            cancelled.set()
+            decode.add_done_callback(log_abandoned)
+
+def sse_event(payload, event=None):
+    """Frame a JSON payload as a server-sent event"""
+    header = f"event: {event}\n".encode() if event else b""
+    return header + b"data: " + orjson.dumps(payload) + b"\n\n"
+
+async def stream_transcript(pcm, cache_key):
+    """Yield each transcript segment as an event, then a "done" event with the
+    whole transcript"""
+    segments = []
+    try:
+        if pcm:
+            if MODEL is not None:
+                stream = stream_model_segments(pcm)
+            else:
+                stream = stream_binary_segments(wav_header(len(pcm)) + pcm)
+            async for segment in stream:
+                segments.append(segment)
+                yield sse_event({"text": segment})
+    except Exception:
+        error_id = secrets.token_hex(6)
+        logger.exception("Error in streaming transcription [%s]", error_id)
+        yield sse_event({"error": "Internal server error", "error_id": error_id}, "error")
+        return
+    
+    transcript = "\n".join(segments)
+    if transcript:
+        cache_transcript(cache_key, transcript)
+    yield sse_event({"transcript": transcript}, "done")
+
+@app.post("/transcribe/stream")
+async def transcribe_stream(file: UploadFile = File(...)):
+    """Transcribe an upload, streaming segments as server-sent events while whisper
+    produces them"""
+    logger.debug("Streaming transcription request received for file: %s", file.filename)
+    
+    cache_key = await hash_upload(file)
+    cached_transcript = get_cached_transcript(cache_key)
+    if cached_transcript is not None:
+        events = [sse_event({"text": segment}) for segment in cached_transcript.splitlines()]
+        events.append(sse_event({"transcript": cached_transcript}, "done"))
+        return StreamingResponse(iter(events), media_type="text/event-stream")
+    
+    if MODEL is None and not (MODEL_OK and BINARY_OK):
+        logger.error("No usable whisper backend: model ok %s, binary ok %s", MODEL_OK, BINARY_OK)
+        return ORJSONResponse(
+            content={"transcript": "Error: The transcription model or whisper binary is not available"}, 
+            status_code=503
         )
-        
-        # Check for output file
-        txt_file = test_wav.replace(".wav", ".txt")
-        txt_content = None
-        if os.path.exists(txt_file):
-            with open(txt_file, "r") as f:
-                txt_content = f.read()
+    
+    # Decode before streaming starts, while the upload is still open, so decoding
+    # errors can still get a proper status code
+    returncode, pcm, ffmpeg_stderr = await decode_audio(file)
+    
+    if returncode != 0:
+        logger.error("ffmpeg conversion failed with error: %s", ffmpeg_stderr)
+        return ORJSONResponse(
+            content={"transcript": f"Error: Failed to convert audio file. ffmpeg error: {ffmpeg_stderr}"}, 
+            status_code=500
+        )
+    
+    if not pcm:
+        # Nothing to transcribe, handled like silent audio as /transcribe does; the
+        # stream still ends with an empty "done" event
+        logger.debug("ffmpeg produced no audio samples")
+    elif await asyncio.to_thread(is_silent, pcm):
+        pcm = b""
+    elif webrtcvad is not None:
+        pcm = await asyncio.to_thread(trim_silence, pcm)
+    
+    return StreamingResponse(stream_transcript(pcm, cache_key), media_type="text/event-stream")
+
+def test_tone_wav():
+    """Three seconds of a 1 kHz tone as a 16 kHz mono PCM WAV"""
+    t = np.arange(3 * 16000) / 16000
+    pcm = (0.5 * 32767 * np.sin(2 * np.pi * 1000 * t)).astype("<i2").tobytes()
+    return wav_header(len(pcm)) + pcm
+
+# Each test runs a full whisper decode; if it is wired into a probe, reuse the last
+# result for TEST_WHISPER_TTL seconds, and let concurrent calls share one run
+TEST_WHISPER_TTL = 60
+TEST_WHISPER_CACHE = {"timestamp": None, "response": None}
+TEST_WHISPER_LOCK = asyncio.Lock()
+
+@app.get("/test-whisper")
+async def test_whisper():
+    """Test the whisper binary directly with a generated test tone.
+
+    A completed run is reused for TEST_WHISPER_TTL seconds, so the result may be up
+    to a minute old; a run that errored is never reused.
+    """
+    async with TEST_WHISPER_LOCK:
+        now = time.monotonic()
+        if TEST_WHISPER_CACHE["response"] is None or now - TEST_WHISPER_CACHE["timestamp"] >= TEST_WHISPER_TTL:
+            result = await run_test_whisper()
+            if "error" in result:
+                return ORJSONResponse(content=result, status_code=500)
+            TEST_WHISPER_CACHE["response"] = result
+            TEST_WHISPER_CACHE["timestamp"] = now
+        return TEST_WHISPER_CACHE["response"]
+
+async def run_test_whisper():
+    """Run the whisper binary on the test tone and report everything it printed"""
+    try:
+        # Generate the tone in memory and pipe it to the binary, the same way
+        # /transcribe feeds it, so nothing is written to or read back from disk
+        test_whisper_cmd = WHISPER_STDIN_COMMAND
+        test_result = await run_command(test_whisper_cmd, test_tone_wav())
         
         result = {
-            "command": " ".join(test_whisper_cmd),
+            "command": shlex.join(test_whisper_cmd),
             "exit_code": test_result.returncode,
             "stdout": test_result.stdout,
             "stderr": test_result.stderr,
-            "txt_file_exists": os.path.exists(txt_file),
-            "txt_content": txt_content,
+            "transcript": extract_transcript(test_result.stdout),
             "binary_path": WHISPER_BINARY,
             "model_path": MODEL_PATH,
-            "model_size": os.path.getsize(MODEL_PATH) if os.path.exists(MODEL_PATH) else 0
+            "model_size": MODEL_SIZE
         }
         
-        # Clean up
-        shutil.rmtree(temp_dir)
-        
         return result
     
-    except Exception as e:
-        import traceback
-        # Clean up on error
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-        
-        return {"error": str(e), "traceback": traceback.format_exc()}
+    except Exception:
+        # Keep the traceback in the server log; the client only gets an id to quote
+        error_id = secrets.token_hex(6)
+        logger.exception("Error in whisper test [%s]", error_id)
+        return {"error": "Internal server error", "error_id": error_id}
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint with extensive diagnostics"""
-    logger.info("Health check requested")
+# Probes hit /health every few seconds; the diagnostics only change when files are
+# replaced on disk, so recompute them at most every HEALTH_TTL seconds
+HEALTH_TTL = 30
+HEALTH_CACHE = {"timestamp": None, "response": None}
+
+def collect_health():
+    """Gather binary and model diagnostics for the health check"""
+    logger.debug("Refreshing health diagnostics")
     
     # Check binary
     binary_exists = os.path.exists(WHISPER_BINARY)
@@ -435,18 +1362,33 @@ async def health_check():
     cli_exists = os.path.exists(WHISPER_BINARY_CLI)
     cli_executable = os.access(WHISPER_BINARY_CLI, os.X_OK) if cli_exists else False
     
-    # Check models
-    base_model_exists = os.path.exists(BASE_MODEL_PATH)
-    base_model_size = os.path.getsize(BASE_MODEL_PATH) if base_model_exists else 0
+    # Check models; one scandir of the models directory gives every size from a
+    # single stat per file instead of an exists and a getsize call per model
+    try:
+        with os.scandir(os.path.join(WHISPER_CPP_DIR, "models")) as entries:
+            model_sizes = {entry.path: entry.stat().st_size for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        model_sizes = {}
+    
+    base_q5_model_exists = BASE_Q5_MODEL_PATH in model_sizes
+    base_q5_model_size = model_sizes.get(BASE_Q5_MODEL_PATH, 0)
+    base_q5_model_status = "Valid" if base_q5_model_size > 40000000 else "Invalid/Corrupted"
+    
+    base_q8_model_exists = BASE_Q8_MODEL_PATH in model_sizes
+    base_q8_model_size = model_sizes.get(BASE_Q8_MODEL_PATH, 0)
+    base_q8_model_status = "Valid" if base_q8_model_size > 50000000 else "Invalid/Corrupted"
+    
+    base_model_exists = BASE_MODEL_PATH in model_sizes
+    base_model_size = model_sizes.get(BASE_MODEL_PATH, 0)
     base_model_status = "Valid" if base_model_size > 100000000 else "Invalid/Corrupted"
     
-    tiny_model_exists = os.path.exists(TINY_MODEL_PATH)
-    tiny_model_size = os.path.getsize(TINY_MODEL_PATH) if tiny_model_exists else 0
+    tiny_model_exists = TINY_MODEL_PATH in model_sizes
+    tiny_model_size = model_sizes.get(TINY_MODEL_PATH, 0)
     tiny_model_status = "Valid" if tiny_model_size > 10000000 else "Invalid/Corrupted"
     
     # Check active model
-    model_exists = os.path.exists(MODEL_PATH)
-    model_size = os.path.getsize(MODEL_PATH) if model_exists else 0
+    model_exists = MODEL_PATH in model_sizes
+    model_size = model_sizes.get(MODEL_PATH, 0)
     model_status = "Valid" if model_size > 10000000 else "Invalid/Corrupted"
     
     # Basic health check response
@@ -458,6 +1400,8 @@ async def health_check():
             "executable": is_executable,
             "type": "whisper-cli" if WHISPER_BINARY == WHISPER_BINARY_CLI else "main"
         },
+        "cpu_features": CPU_FEATURES,
+        "backend": "in-process" if MODEL is not None else "whisper-server" if WHISPER_SERVER["client"] is not None else "binary",
         "available_binaries": {
             "main": {
                 "path": WHISPER_BINARY_MAIN,
@@ -477,6 +1421,18 @@ async def health_check():
                 "size_bytes": model_size,
                 "status": model_status
             },
+            "base_q5_0": {
+                "path": BASE_Q5_MODEL_PATH,
+                "exists": base_q5_model_exists,
+                "size_bytes": base_q5_model_size,
+                "status": base_q5_model_status
+            },
+            "base_q8_0": {
+                "path": BASE_Q8_MODEL_PATH,
+                "exists": base_q8_model_exists,
+                "size_bytes": base_q8_model_size,
+                "status": base_q8_model_status
+            },
             "base": {
                 "path": BASE_MODEL_PATH,
                 "exists": base_model_exists,
@@ -495,6 +1451,18 @@ async def health_check():
     
     return response
 
+@app.get("/health")
+async def health_check():
+    """Health check endpoint with extensive diagnostics"""
+    now = time.monotonic()
+    if HEALTH_CACHE["response"] is None or now - HEALTH_CACHE["timestamp"] >= HEALTH_TTL:
+        # The diagnostics are a run of stat/access calls, so make them on a worker
+        # thread where a slow disk doesn't stall other requests, and cache the
+        # encoded body so probes between refreshes skip serialization too
+        HEALTH_CACHE["response"] = orjson.dumps(await asyncio.to_thread(collect_health))
+        HEALTH_CACHE["timestamp"] = now
+    return Response(content=HEALTH_CACHE["response"], media_type="application/json")
+
 @app.get("/")
 async def root():
     """Root endpoint for quick testing"""